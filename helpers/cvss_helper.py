@@ -1,7 +1,45 @@
 import argparse
-import json
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+import orjson
+
+# Below this size the mmap setup costs more than a plain read
+MMAP_THRESHOLD = 64 * 1024
+
+# Sidecar in the output directory: {source_path: [mtime_ns, score, version]}.
+# Deliberately not *.json so it is never mistaken for a result file.
+SCORE_CACHE_FILE = ".cvss_score_cache"
+
+# (metrics key, version) pairs in priority order: v4.0 -> v3.1 -> v3.0 -> v2.0
+_NVD_PRIORITY = (
+    ("cvssMetricV40", "4.0"),
+    ("cvssMetricV31", "3.1"),
+    ("cvssMetricV30", "3.0"),
+    ("cvssMetricV2", "2.0")
+)
+_MITRE_PRIORITY = (
+    ("cvssV4_0", "4.0"),
+    ("cvssV3_1", "3.1"),
+    ("cvssV3_0", "3.0"),
+    ("cvssV2_0", "2.0")
+)
+
+# key -> (rank, version), for the single-pass MITRE scan
+_MITRE_RANK = {key: (rank, version_str) for rank, (key, version_str) in enumerate(_MITRE_PRIORITY)}
+
+def load_json_file(path: Path) -> dict:
+    """
+    Parses a JSON file, reading large files through a read-only memory map.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size <= MMAP_THRESHOLD:
+            return orjson.loads(f.read())
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            return orjson.loads(view)
+
 def get_nvd_cvss_score(data: dict) -> tuple[float, str] | tuple[None, None]:
     """
     Extracts the highest available CVSS base score and its version from NVD JSON data.
@@ -11,20 +49,11 @@ def get_nvd_cvss_score(data: dict) -> tuple[float, str] | tuple[None, None]:
         vulnerability_info = data.get("vulnerabilities", [])[0]
         metrics = vulnerability_info.get("cve", {}).get("metrics", {})
 
-        version_priority = {
-            "cvssMetricV40": "4.0",
-            "cvssMetricV31": "3.1",
-            "cvssMetricV30": "3.0",
-            "cvssMetricV2": "2.0"
-        }
-
-        for key, version_str in version_priority.items():
-            if key in metrics:
-                metric_list = metrics[key]
-                if metric_list:
-                    score = metric_list[0].get("cvssData", {}).get("baseScore")
-                    if score is not None:
-                        return score, version_str
+        for key, version_str in _NVD_PRIORITY:
+            if metric_list := metrics.get(key):
+                score = metric_list[0].get("cvssData", {}).get("baseScore")
+                if score is not None:
+                    return score, version_str
     except (IndexError, AttributeError, TypeError):
         return None, None
     return None, None
@@ -39,27 +68,123 @@ def get_mitre_cvss_score(data: dict) -> tuple[float, str] | tuple[None, None]:
         if not metrics:
             return None, None
 
-        version_priority = {
-            "cvssV4_0": "4.0",
-            "cvssV3_1": "3.1",
-            "cvssV3_0": "3.0",
-            "cvssV2_0": "2.0"
-        }
-
-        for key, version_str in version_priority.items():
-            for metric in metrics:
-                if key in metric:
-                    score = metric.get(key, {}).get("baseScore")
-                    if score is not None:
-                        return score, version_str
+        # Single pass over the metrics, keeping the highest-priority score seen
+        best_rank, best_score, best_version = len(_MITRE_PRIORITY), None, None
+        for metric in metrics:
+            for key, value in metric.items():
+                entry = _MITRE_RANK.get(key)
+                if entry is None or entry[0] >= best_rank or not isinstance(value, dict):
+                    continue
+                score = value.get("baseScore")
+                if score is not None:
+                    best_rank, best_score, best_version = entry[0], score, entry[1]
+            if best_rank == 0:
+                break
     except (IndexError, AttributeError, TypeError):
         return None, None
-    return None, None
+    if best_score is None:
+        return None, None
+    return best_score, best_version
+
+def parse_nvd_cvss_score(path: Path) -> tuple[float, str] | tuple[None, None]:
+    """
+    Fully parses an NVD file and extracts its CVSS score.
+    """
+    return get_nvd_cvss_score(load_json_file(path))
+
+def parse_mitre_cvss_score(path: Path) -> tuple[float, str] | tuple[None, None]:
+    """
+    Fully parses a MITRE file and extracts its CVSS score.
+    """
+    return get_mitre_cvss_score(load_json_file(path))
+
+def load_score_cache(path: Path) -> dict:
+    """
+    Loads the score cache from a previous run. A missing or corrupt cache is treated as empty.
+    """
+    try:
+        with open(path, "rb") as f:
+            cache = orjson.loads(f.read())
+    except (orjson.JSONDecodeError, IOError):
+        return {}
+
+    if not isinstance(cache, dict) or not all(
+        isinstance(entry, list) and len(entry) == 3 for entry in cache.values()
+    ):
+        return {}
+    return cache
+
+def cached_cvss_score(path: Path, extract, cache: dict) -> tuple[float, str] | tuple[None, None]:
+    """
+    Returns extract(path), reusing the cached result while the file's mtime is unchanged.
+    Returns (None, None) if the file does not exist.
+    """
+    try:
+        mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None, None
+
+    key = os.path.abspath(path)
+    entry = cache.get(key)
+    if entry is not None and entry[0] == mtime:
+        return entry[1], entry[2]
+
+    score, version = extract(path)
+    cache[key] = [mtime, score, version]
+    return score, version
+
+def process_one(output_file: Path, json_dir: Path, cache: dict, force: bool = False) -> tuple[str | None, float | None, str | None, str | None, bool]:
+    """
+    Updates a single output JSON file with the CVSS score from its NVD/MITRE sources.
+    Files that already have a CVSS score are left untouched unless force is set.
+    Scores extracted from the sources are memoized in cache.
+    Returns (cve_id, score, version, source, updated).
+    """
+    with open(output_file, "rb") as f:
+        output_data = orjson.loads(f.read())
+
+    cve_id = output_data.get("CVE_ID")
+    if not cve_id:
+        return None, None, None, None, False
+
+    # Already scored on a previous run
+    if output_data.get("CVSS_score") is not None and not force:
+        return cve_id, output_data["CVSS_score"], output_data.get("CVSS_version"), None, False
+
+    score, version, source = None, None, None
+    nvd_file = json_dir / f"{cve_id}.nvd"
+    mitre_file = json_dir / f"{cve_id}.mitre"
+
+    # 1. Check NVD first (Primary Priority)
+    score, version = cached_cvss_score(nvd_file, parse_nvd_cvss_score, cache)
+    if score is not None:
+        source = "nvd"
+
+    # 2. Check MITRE if NVD didn't yield a score
+    if score is None:
+        score, version = cached_cvss_score(mitre_file, parse_mitre_cvss_score, cache)
+        if score is not None:
+            source = "mitre"
+
+    # 3. Update and save the file if a score was found
+    if score is None:
+        return cve_id, None, None, None, False
+
+    output_data["CVSS_score"] = score
+    output_data["CVSS_version"] = f"{version}.{source}"
+
+    # Write back to the exact same file
+    with open(output_file, "wb") as f:
+        f.write(orjson.dumps(output_data, option=orjson.OPT_INDENT_2))
+
+    return cve_id, score, version, source, True
 
 def main():
     parser = argparse.ArgumentParser(description="Update output JSON files with CVSS scores from NVD/MITRE data.")
     parser.add_argument("json_dir", type=str, help="Directory containing the source .nvd and .mitre files.")
     parser.add_argument("output_dir", type=str, help="Directory containing the target JSON files to update.")
+    parser.add_argument("--workers", type=int, default=min(32, (os.cpu_count() or 1) * 4), help="Number of parallel worker threads.")
+    parser.add_argument("--force", action="store_true", help="Recompute scores for files that already have a CVSS score, ignoring the score cache.")
     args = parser.parse_args()
 
     json_dir = Path(args.json_dir)
@@ -75,55 +200,46 @@ def main():
 
     updated_count = 0
     missing_count = 0
+    skipped_count = 0
+
+    # Process all JSON files in the output directory in parallel
+    cache_file = output_dir / SCORE_CACHE_FILE
+    cache = {} if args.force else load_score_cache(cache_file)
+
+    with os.scandir(output_dir) as it:
+        files = [
+            Path(e.path) for e in it
+            if e.name.endswith(".json") and e.is_file()
+        ]
+
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(process_one, output_file, json_dir, cache, args.force): output_file for output_file in files}
+
+        for future in as_completed(futures):
+            output_file = futures[future]
+            try:
+                cve_id, score, version, source, updated = future.result()
+            except (orjson.JSONDecodeError, IOError) as e:
+                print(f"[!] Error processing {output_file.name}: {e}")
+                continue
 
-    # Iterate over all JSON files in the output directory
-    for output_file in output_dir.glob("*.json"):
-        try:
-            with open(output_file, "r", encoding="utf-8") as f:
-                output_data = json.load(f)
-            
-            cve_id = output_data.get("CVE_ID")
             if not cve_id:
                 print(f"[!] No 'CVE_ID' found in {output_file.name}. Skipping.")
-                continue
-
-            score, version, source = None, None, None
-            nvd_file = json_dir / f"{cve_id}.nvd"
-            mitre_file = json_dir / f"{cve_id}.mitre"
-
-            # 1. Check NVD first (Primary Priority)
-            if nvd_file.is_file():
-                with open(nvd_file, "r", encoding="utf-8") as f:
-                    nvd_data = json.load(f)
-                score, version = get_nvd_cvss_score(nvd_data)
-                if score is not None:
-                    source = "nvd"
-
-            # 2. Check MITRE if NVD didn't yield a score
-            if score is None and mitre_file.is_file():
-                with open(mitre_file, "r", encoding="utf-8") as f:
-                    mitre_data = json.load(f)
-                score, version = get_mitre_cvss_score(mitre_data)
-                if score is not None:
-                    source = "mitre"
-
-            # 3. Update and save the file if a score was found
-            if score is not None:
-                output_data["CVSS_score"] = score
-                output_data["CVSS_version"] = f"{version}.{source}"
-                
-                # Write back to the exact same file
-                with open(output_file, "w", encoding="utf-8") as f:
-                    json.dump(output_data, f, indent=2)
-                
-                print(f"[+] Updated {cve_id:<18} -> Score: {score:<4} | Version: {output_data['CVSS_version']}")
+            elif updated:
+                print(f"[+] Updated {cve_id:<18} -> Score: {score:<4} | Version: {version}.{source}")
                 updated_count += 1
+            elif score is not None:
+                print(f"[=] Skipped {cve_id:<18} -> Score: {score:<4} | Version: {version} (already set)")
+                skipped_count += 1
             else:
                 print(f"[-] No CVSS score found for {cve_id} in '{json_dir}'.")
                 missing_count += 1
 
-        except (json.JSONDecodeError, IOError) as e:
-            print(f"[!] Error processing {output_file.name}: {e}")
+    try:
+        with open(cache_file, "wb") as f:
+            f.write(orjson.dumps(cache))
+    except IOError as e:
+        print(f"[!] Failed to save score cache {cache_file}: {e}")
 
     # Print Summary
     print("\n" + "="*50)
@@ -131,6 +247,7 @@ def main():
     print("="*50)
     print(f"Files updated successfully : {updated_count}")
     print(f"Files missing CVSS data    : {missing_count}")
+    print(f"Files already scored       : {skipped_count}")
     print("="*50)
 
 if __name__ == "__main__":
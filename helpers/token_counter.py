@@ -1,6 +1,8 @@
-import json
+import orjson
+import os
 import re
 import requests
+from collections import defaultdict
 from pathlib import Path
 
 # =========================
@@ -22,9 +24,11 @@ JSON_DIR = Path("json")
 # TOKEN COUNT VIA OLLAMA
 # =========================
 
+session = requests.Session()
+
 def count_tokens(text: str) -> int:
     try:
-        r = requests.post(
+        r = session.post(
             OLLAMA_URL,
             json={
                 "model": MODEL,
@@ -35,7 +39,7 @@ def count_tokens(text: str) -> int:
             timeout=120
         )
         r.raise_for_status()
-        return r.json()["prompt_eval_count"]
+        return orjson.loads(r.content)["prompt_eval_count"]
     except Exception as e:
         print("❌ Ollama token count failed:", e)
         exit(1)
@@ -72,38 +76,33 @@ available_for_json = max_input_tokens - system_tokens - static_tokens
 
 print("Scanning CVE pairs...\n")
 
-pattern = re.compile(r"CVE-\d{4}-\d+", re.I)
-pairs = {}
+pattern = re.compile(r"(CVE-\d{4}-\d+)\.(nvd|mitre)$")
+pairs = defaultdict(dict)
+complete = set()
 
 if not JSON_DIR.exists():
     print("❌ json directory not found")
     exit()
 
-for file in JSON_DIR.iterdir():
-    if not file.is_file():
-        continue
-
-    match = pattern.search(file.name)
-    if not match:
-        continue
+with os.scandir(JSON_DIR) as it:
+    for entry in it:
+        if not entry.is_file():
+            continue
 
-    cve_id = match.group(0).upper()
-    pairs.setdefault(cve_id, {})
+        match = pattern.match(entry.name)
+        if not match:
+            continue
 
-    suffix = file.suffix.lower()
+        cve_id, source = match.groups()
+        files = pairs[cve_id]
+        files[source] = Path(entry.path)
+        if len(files) == 2:
+            complete.add(cve_id)
 
-    if suffix == ".nvd":
-        pairs[cve_id]["nvd"] = file
-    elif suffix == ".mitre":
-        pairs[cve_id]["mitre"] = file
+valid_pairs = {cve_id: pairs[cve_id] for cve_id in complete}
 
-valid_pairs = {}
-
-for cve_id, files in pairs.items():
-    if "nvd" in files and "mitre" in files:
-        valid_pairs[cve_id] = files
-    else:
-        print(f"⚠ incomplete pair: {cve_id}")
+for cve_id in sorted(pairs.keys() - complete):
+    print(f"⚠ incomplete pair: {cve_id}")
 
 if not valid_pairs:
     print("\n❌ No valid CVE pairs found.")
@@ -116,14 +115,22 @@ print(f"Pairs found: {len(valid_pairs)}\n")
 # FIND LARGEST CVE PAIR
 # =========================
 
+# Rank pairs by on-disk size; only the winner needs to be parsed.
+# The constant covers the {"nvd":,"mitre":} wrapper of the merged JSON.
+pair_sizes = {
+    cve_id: files["nvd"].stat().st_size + files["mitre"].stat().st_size + 20
+    for cve_id, files in valid_pairs.items()
+}
+
 largest_pair_json = None
 largest_size = 0
 largest_id = None
 
-for cve_id, files in valid_pairs.items():
+for cve_id in sorted(pair_sizes, key=pair_sizes.get, reverse=True):
+    files = valid_pairs[cve_id]
     try:
-        nvd_data = json.loads(files["nvd"].read_text(encoding="utf-8"))
-        mitre_data = json.loads(files["mitre"].read_text(encoding="utf-8"))
+        nvd_data = orjson.loads(files["nvd"].read_bytes())
+        mitre_data = orjson.loads(files["mitre"].read_bytes())
     except Exception as e:
         print(f"⚠ skipping {cve_id} (invalid JSON)")
         continue
@@ -133,13 +140,10 @@ for cve_id, files in valid_pairs.items():
         "mitre": mitre_data
     }
 
-    merged_str = json.dumps(merged, separators=(",", ":"))
-    size = len(merged_str)
-
-    if size > largest_size:
-        largest_size = size
-        largest_pair_json = merged_str
-        largest_id = cve_id
+    largest_pair_json = orjson.dumps(merged).decode()
+    largest_size = len(largest_pair_json)
+    largest_id = cve_id
+    break
 
 if not largest_pair_json:
     print("❌ Could not build any merged CVE JSON.")
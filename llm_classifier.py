@@ -1,7 +1,7 @@
-import json
-import requests
+import asyncio
+import orjson
+import httpx
 import time
-import re
 import logging
 from typing import Any, Dict, Optional
 
@@ -14,24 +14,25 @@ def safe_json_loads(s: str) -> dict:
     if not s: 
         raise ValueError("Received empty string from AI.")
     try:
-        match = re.search(r'(\{.*\})', s, re.DOTALL)
-        if match:
-            return json.loads(match.group(1))
-        return json.loads(s)
+        # Outermost braces, same span the greedy r'\{.*\}' regex matched
+        start = s.find("{")
+        end = s.rfind("}")
+        if start != -1 and end > start:
+            return orjson.loads(s[start:end + 1])
+        return orjson.loads(s)
     except Exception as e:
         raise ValueError(f"JSON parse failed: {e}. Raw snippet: {s[:200]}")
 
-def _query(payload: dict, url: str, attempts: int, delay: int, timeout: int) -> Optional[str]:
+async def _query(client: httpx.AsyncClient, payload: dict, url: str, attempts: int, delay: int, timeout: int) -> Optional[str]:
     """Internal function to handle HTTP POST requests with attempts."""
-    session = requests.Session()
     for attempt in range(1, attempts + 1):
         try:
-            r = session.post(url, json=payload, timeout=timeout)
+            r = await client.post(url, json=payload, timeout=timeout)
 
             if r.status_code != 200:
                 raise RuntimeError(f"Bad status {r.status_code}")
 
-            data = r.json()
+            data = orjson.loads(r.content)
             content = (
                 data.get("choices", [{}])[0]
                 .get("message", {})
@@ -44,7 +45,7 @@ def _query(payload: dict, url: str, attempts: int, delay: int, timeout: int) ->
         except Exception as e:
             logging.warning("AI network/API failure %d/%d: %s", attempt, attempts, e)
 
-        time.sleep(delay)
+        await asyncio.sleep(delay)
 
     return None
 
@@ -59,6 +60,7 @@ class CVEClassifier:
                  attempts: int, 
                  retry_delay: int, 
                  timeout: int, 
+                 prompt_template: str,
                  role_file: str = "text/role",
                  template_file: str = "text/output_template.json"):
         self.model = model
@@ -77,13 +79,26 @@ class CVEClassifier:
 
         # Load Output Template Mapping
         try:
-            with open(template_file, 'r', encoding='utf-8') as f:
-                self.output_map = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError) as e:
+            with open(template_file, 'rb') as f:
+                self.output_map = orjson.loads(f.read())
+        except (FileNotFoundError, orjson.JSONDecodeError) as e:
             logging.error(f"Failed to load template file {template_file}: {e}")
             raise
 
-    def classify(self, cve_data: Dict[str, Any], prompt_template: str, cve_id_fallback: str) -> Dict[str, Any]:
+        # Precompute (final_key, ai_key, is_list) once. CVE_ID is skipped so we
+        # don't overwrite our valid ID with 'null' from the AI
+        self._output_spec = [
+            (final_key, ai_key, "Vendors" in final_key or "Products" in final_key)
+            for final_key, ai_key in self.output_map.items()
+            if final_key != "CVE_ID"
+        ]
+
+        # Split the prompt around the CVE placeholder once, so each call only concatenates
+        self._prompt_prefix, found, self._prompt_suffix = prompt_template.partition("{full_json_str}")
+        if not found:
+            logging.warning("Prompt template has no {full_json_str} placeholder; CVE JSON will be appended at the end.")
+
+    async def classify(self, client: httpx.AsyncClient, cve_data: Dict[str, Any], cve_id_fallback: str) -> Dict[str, Any]:
         start_time = time.time()
         
         # 1. Get the ID first - this is our "Source of Truth"
@@ -94,8 +109,8 @@ class CVEClassifier:
             or cve_id_fallback
         )
 
-        full_json_str = json.dumps(cve_data, separators=(",", ":"))
-        prompt = prompt_template.replace("{full_json_str}", full_json_str)
+        full_json_str = orjson.dumps(cve_data).decode()
+        prompt = self._prompt_prefix + full_json_str + self._prompt_suffix
 
         payload = {
             "model": self.model,
@@ -114,7 +129,7 @@ class CVEClassifier:
 
         for attempt in range(1, self.attempts + 1):
             attempts_used = attempt
-            raw = _query(payload, self.url, self.attempts, self.retry_delay, self.timeout)
+            raw = await _query(client, payload, self.url, self.attempts, self.retry_delay, self.timeout)
             
             if not raw:
                 continue
@@ -123,27 +138,21 @@ class CVEClassifier:
                 data = safe_json_loads(raw)
                 break
             except ValueError:
-                time.sleep(self.retry_delay)
+                await asyncio.sleep(self.retry_delay)
 
         execution_time = round(time.time() - start_time, 2)
 
-        # 2. Initialize result with the CORRECT ID
-        result = {"CVE_ID": cve_id} 
-        
+        # 2. Every result carries the CORRECT ID
         if not data:
-            result.update({"error": True, "attempts": attempts_used, "execution_time_seconds": execution_time})
-            return result
-
-        # 3. Map AI response keys, but SKIP CVE_ID if it's in the template
-        # so we don't overwrite our valid ID with 'null' from the AI
-        for final_key, ai_key in self.output_map.items():
-            if final_key == "CVE_ID":
-                continue 
-                
-            default_val = [] if any(x in final_key for x in ["Vendors", "Products"]) else None
-            result[final_key] = data.get(ai_key, default_val)
-
-        result["execution_time_seconds"] = execution_time
-        result["attempts"] = attempts_used
-        
-        return result
\ No newline at end of file
+            return {"CVE_ID": cve_id, "error": True, "attempts": attempts_used, "execution_time_seconds": execution_time}
+
+        # 3. Map AI response keys (CVE_ID is already excluded from the spec)
+        return {
+            "CVE_ID": cve_id,
+            **{
+                final_key: data.get(ai_key, [] if is_list else None)
+                for final_key, ai_key, is_list in self._output_spec
+            },
+            "execution_time_seconds": execution_time,
+            "attempts": attempts_used
+        }
\ No newline at end of file
@@ -1,10 +1,11 @@
 import os
-import json
 import argparse
+import asyncio
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from collections import defaultdict
-from tqdm import tqdm
+from typing import Dict, List, Optional, Tuple
+import httpx
+import orjson
+from tqdm.asyncio import tqdm
 
 # Import the classifier logic
 from llm_classifier import CVEClassifier
@@ -22,45 +23,60 @@ def load_config(config_path: str) -> dict:
         return {}
     
     try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with open(config_path, 'rb') as f:
+            return orjson.loads(f.read())
     except Exception as e:
         logging.error(f"Failed to parse config file: {e}")
         return {}
 
 # ---------------------------------------------------------
-# FILE GROUPING
+# JSON FILE READER
 # ---------------------------------------------------------
 
-def group_cve_files(json_dir: str) -> dict:
-    groups = defaultdict(dict)
+def load_json_file(path: str):
+    """Reads and parses a single CVE source file."""
+    with open(path, "rb") as f:
+        return orjson.loads(f.read())
 
-    if not os.path.exists(json_dir):
-        logging.error(f"Input directory '{json_dir}' does not exist.")
-        return groups
+# ---------------------------------------------------------
+# FILE GROUPING
+# ---------------------------------------------------------
 
-    for f in os.listdir(json_dir):
-        if not (f.endswith(".json") or f.endswith(".nvd") or f.endswith(".mitre")):
-            continue
+# One row per CVE: (base, nvd_filename, mitre_filename)
+CVEGroup = Tuple[str, Optional[str], Optional[str]]
 
-        base, ext = os.path.splitext(f)
-        ext = ext.lower()
+def group_cve_files(json_dir: str) -> List[CVEGroup]:
+    index: Dict[str, int] = {}
+    rows: List[list] = []
 
-        if ext in [".nvd", ".mitre"]:
-            groups[base][ext[1:]] = f
+    if not os.path.exists(json_dir):
+        logging.error(f"Input directory '{json_dir}' does not exist.")
+        return []
+
+    # scandir reports the entry type from the directory listing, so no extra stat() per file
+    with os.scandir(json_dir) as it:
+        for entry in it:
+            f = entry.name
+            if not (f.endswith(".nvd") or f.endswith(".mitre")) or not entry.is_file():
+                continue
+
+            base, ext = os.path.splitext(f)
+            row = index.get(base)
+            if row is None:
+                row = index[base] = len(rows)
+                rows.append([base, None, None])
+            rows[row][1 if ext == ".nvd" else 2] = f
             
-    return groups
+    return [tuple(r) for r in rows]
 
-def get_single_file_group(file_path: str) -> dict:
+def get_single_file_group(file_path: str) -> List[CVEGroup]:
     """
     Creates a group for a single file. 
     It attempts to find the sibling file (pair .nvd/.mitre) automatically.
     """
-    groups = defaultdict(dict)
-    
     if not os.path.exists(file_path):
         logging.error(f"File not found: {file_path}")
-        return groups
+        return []
 
     dirname = os.path.dirname(file_path)
     filename = os.path.basename(file_path)
@@ -69,7 +85,7 @@ def get_single_file_group(file_path: str) -> dict:
 
     if ext not in [".nvd", ".mitre", ".json"]:
         logging.error(f"Unsupported file extension: {ext}")
-        return groups
+        return []
 
     # If it's a standard JSON, just add it
     if ext == ".json":
@@ -78,50 +94,83 @@ def get_single_file_group(file_path: str) -> dict:
         # Let's assume standalone JSONs map to 'nvd' for simplicity or 'mitre' based on content.
         # But based on previous logic, we need strict keys.
         # Let's map it to 'mitre' as primary.
-        groups[base]["mitre"] = filename
-        return groups
+        return [(base, None, filename)]
 
     # If it is .nvd or .mitre, add it and look for its partner
-    type_key = ext[1:] # "nvd" or "mitre"
-    groups[base][type_key] = filename
-
-    # Try to find the partner
-    partner_ext = ".mitre" if type_key == "nvd" else ".nvd"
+    partner_ext = ".mitre" if ext == ".nvd" else ".nvd"
     partner_file = base + partner_ext
     
-    if os.path.exists(os.path.join(dirname, partner_file)):
-        groups[base][partner_ext[1:]] = partner_file
+    if not os.path.exists(os.path.join(dirname, partner_file)):
+        partner_file = None
 
-    return groups
+    if ext == ".nvd":
+        return [(base, filename, partner_file)]
+    return [(base, partner_file, filename)]
 
 # ---------------------------------------------------------
 # WORKER
 # ---------------------------------------------------------
 
-def process_file_group(base: str, file_map: dict, base_dir: str, args: argparse.Namespace, classifier: CVEClassifier, prompt_template: str):
-    combined = {}
+async def process_file_group(base: str, nvd: Optional[str], mitre: Optional[str], base_dir: str, args: argparse.Namespace, classifier: CVEClassifier, client: httpx.AsyncClient, semaphore: asyncio.Semaphore):
+    # Load inside the semaphore so only `workers` groups are held in memory at a time,
+    # and parse in a thread so in-flight responses are not blocked on the event loop
+    async with semaphore:
+        combined = {}
 
-    for t in ["nvd", "mitre"]:
-        fname = file_map.get(t)
-        if not fname:
-            continue
+        for t, fname in (("nvd", nvd), ("mitre", mitre)):
+            if not fname:
+                continue
 
-        # If base_dir is None, it means we are in single file mode and fname is likely absolute or relative to cwd, 
-        # OR we need to combine it with the dir of the input file.
-        # Actually, let's keep it simple: group_cve_files returns filenames relative to json_dir.
-        # get_single_file_group returns filenames relative to the file's directory.
-        
-        path = os.path.join(base_dir, fname)
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                combined[t] = json.load(f)
-        except Exception as e:
-            logging.warning("Failed reading %s: %s", fname, e)
+            # If base_dir is None, it means we are in single file mode and fname is likely absolute or relative to cwd, 
+            # OR we need to combine it with the dir of the input file.
+            # Actually, let's keep it simple: group_cve_files returns filenames relative to json_dir.
+            # get_single_file_group returns filenames relative to the file's directory.
+            
+            path = os.path.join(base_dir, fname)
+            try:
+                combined[t] = await asyncio.to_thread(load_json_file, path)
+            except Exception as e:
+                logging.warning("Failed reading %s: %s", fname, e)
 
-    if not combined:
-        return None
+        if not combined:
+            return None
 
-    return classifier.classify(combined, prompt_template, base)
+        return await classifier.classify(client, combined, base)
+
+async def classify_groups(groups: List[CVEGroup], base_dir: str, args: argparse.Namespace, classifier: CVEClassifier) -> list:
+    """Classifies all groups concurrently, bounded by args.workers. Returns the failed CVE IDs."""
+    failed_cves = []
+    semaphore = asyncio.Semaphore(args.workers)
+    limits = httpx.Limits(max_connections=args.workers)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        tasks = [
+            asyncio.create_task(process_file_group(base, nvd, mitre, base_dir, args, classifier, client, semaphore))
+            for base, nvd, mitre in groups
+        ]
+
+        for task in tqdm.as_completed(tasks, total=len(tasks), desc="Classifying"):
+            try:
+                r = await task
+                
+                if not r:
+                    continue
+
+                if r.get("error"):
+                    failed_cves.append(r["CVE_ID"])
+                    continue
+
+                cve_id = r["CVE_ID"]
+                out_path = os.path.join(args.out_dir, f"{cve_id}.json")
+
+                try:
+                    with open(out_path, "wb") as f:
+                        f.write(orjson.dumps(r, option=orjson.OPT_INDENT_2))
+                except Exception as e:
+                    logging.warning("Failed writing %s: %s", out_path, e)
+            except Exception as e:
+                logging.error(f"Critical error in worker task: {e}")
+
+    return failed_cves
 
 # ---------------------------------------------------------
 # MAIN
@@ -185,7 +234,8 @@ def main():
         url=args.ollama_url,
         attempts=args.attempts,
         retry_delay=args.retry_delay,
-        timeout=args.timeout
+        timeout=args.timeout,
+        prompt_template=prompt_template
     )
 
     # DETERMINE INPUT SOURCE
@@ -201,42 +251,11 @@ def main():
         print(f"No valid input found.")
         return
 
-    failed_cves = []
-    
     print(f"Starting processing with {args.workers} workers...")
     print(f"Input Mode: {'Single File' if args.file else 'Directory'}")
     print(f"Model: {args.model} | Output: {args.out_dir} | Max Attempts: {args.attempts}")
 
-    with ThreadPoolExecutor(max_workers=args.workers) as executor:
-        # Pass base_dir to the worker
-        futures = {
-            executor.submit(process_file_group, base, fmap, base_dir, args, classifier, prompt_template): base
-            for base, fmap in groups.items()
-        }
-
-        for future in tqdm(as_completed(futures), total=len(futures), desc="Classifying"):
-            try:
-                r = future.result()
-                
-                if not r:
-                    continue
-
-                if r.get("error"):
-                    failed_cves.append(r["CVE_ID"])
-                    continue
-
-                cve_id = r["CVE_ID"]
-                out_path = os.path.join(args.out_dir, f"{cve_id}.json")
-
-                try:
-                    with open(out_path, "w", encoding="utf-8") as f:
-                        json.dump(r, f, indent=2)
-                        f.flush()
-                        os.fsync(f.fileno()) 
-                except Exception as e:
-                    logging.warning("Failed writing %s: %s", out_path, e)
-            except Exception as e:
-                logging.error(f"Critical error in worker thread: {e}")
+    failed_cves = asyncio.run(classify_groups(groups, base_dir, args, classifier))
 
     if failed_cves:
         with open(args.failed_log, "w", encoding="utf-8") as f: